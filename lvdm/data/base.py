@@ -1,5 +1,6 @@
 from abc import abstractmethod
-from torch.utils.data import IterableDataset
+import numpy as np
+from torch.utils.data import IterableDataset, Sampler
 
 
 class Txt2ImgIterableBaseDataset(IterableDataset):
@@ -20,4 +21,51 @@ class Txt2ImgIterableBaseDataset(IterableDataset):
 
     @abstractmethod
     def __iter__(self):
-        pass
\ No newline at end of file
+        pass
+
+
+class CostBucketBatchSampler(Sampler):
+    '''
+    Batch sampler grouping samples of similar preprocessing cost (e.g. video duration or file size),
+    so that a single slow sample does not hold back an otherwise fast batch.
+    Samples are split into cost quantile buckets, shuffled within each bucket and batched there;
+    the batch order is shuffled again every epoch.
+    '''
+    def __init__(self, costs, batch_size, num_buckets=8, drop_last=False, seed=0, num_replicas=1, rank=0):
+        self.costs = np.asarray(costs, dtype=np.float64)
+        self.batch_size = batch_size
+        self.num_buckets = num_buckets
+        self.drop_last = drop_last
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
+        edges = np.quantile(self.costs, np.linspace(0, 1, num_buckets + 1)[1:-1])
+        self.bucket_ids = np.searchsorted(edges, self.costs, side='right')
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _batches(self):
+        rng = np.random.default_rng(self.seed + self.epoch)
+        batches = []
+        for bucket in range(self.num_buckets):
+            ids = np.flatnonzero(self.bucket_ids == bucket)
+            rng.shuffle(ids)
+            for start in range(0, len(ids), self.batch_size):
+                batch = ids[start:start + self.batch_size]
+                if self.drop_last and len(batch) < self.batch_size:
+                    continue
+                batches.append(batch.tolist())
+        batches = [batches[i] for i in rng.permutation(len(batches))]
+        ## every replica gets the same number of batches
+        num_batches = len(batches) // self.num_replicas
+        return batches[self.rank:num_batches * self.num_replicas:self.num_replicas]
+
+    def __iter__(self):
+        return iter(self._batches())
+
+    def __len__(self):
+        counts = np.bincount(self.bucket_ids, minlength=self.num_buckets)
+        num_batches = counts // self.batch_size if self.drop_last else -(-counts // self.batch_size)
+        return int(num_batches.sum()) // self.num_replicas
@@ -1,13 +1,87 @@
+import io
 import os
-import random
+from glob import glob
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
+import numpy as np
 import pandas as pd
-from decord import VideoReader, cpu
+from decord import VideoReader, cpu, gpu, bridge
+from decord._ffi.base import DECORDError
 
 import torch
+import torch.nn as nn
 from torch.utils.data import Dataset
 from torch.utils.data import DataLoader
-from torchvision import transforms
+from torchvision.transforms import v2
+try:
+    import numba
+    NUMBA_IS_AVAILBLE = True
+except:
+    NUMBA_IS_AVAILBLE = False
+try:
+    import h5py
+    H5PY_IS_AVAILBLE = True
+except:
+    H5PY_IS_AVAILBLE = False
+
+## let decord hand back torch tensors sharing its frame buffer (no asnumpy copy)
+bridge.set_bridge('torch')
+
+
+if NUMBA_IS_AVAILBLE:
+    ## serial on purpose: it runs inside dataloader worker processes, which already parallelize across samples
+    @numba.njit(fastmath=True, cache=True)
+    def _to_normalized_float32(src, dst):
+        ## single pass: uint8 src (any strides, e.g. a permuted [t,h,w,c] buffer) -> contiguous float32 dst in [-1,1]
+        C, T, H, W = src.shape
+        scale = np.float32(2.0 / 255.0)
+        for t in range(T):
+            for c in range(C):
+                for h in range(H):
+                    for w in range(W):
+                        dst[c, t, h, w] = src[c, t, h, w] * scale - np.float32(1.0)
+
+
+def _as_tensor(frames):
+    ## get_batch returns a decord NDArray when the torch bridge is not active (e.g. reset elsewhere):
+    ## share the numpy buffer instead of copying it
+    if not isinstance(frames, torch.Tensor):
+        frames = torch.from_numpy(frames.asnumpy())
+    return frames
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def script_spatial_transform(transform):
+    """
+    Fold a (Compose of) v2 transform(s) into one scripted module, keeping the eager transform if scripting fails.
+    Scripted modules cannot be pickled, so this only suits fork-started dataloader workers.
+    """
+    transforms = transform.transforms if isinstance(transform, v2.Compose) else [transform]
+    try:
+        return torch.jit.script(nn.Sequential(*transforms))
+    except Exception as e:
+        print(f"Scripting spatial transform failed, falling back to eager mode: {e}")
+        return transform
+
+
+def normalize_frames(frames):
+    """
+    uint8 [c,t,h,w] frames -> contiguous float32 in [-1,1].
+    Uses the fused numba kernel for cpu tensors when numba is available.
+    """
+    if frames.device.type != 'cpu':
+        return frames.float().mul_(1.0 / 127.5).sub_(1.0)
+    out = torch.empty(frames.shape, dtype=torch.float32)
+    ## the kernel is compiled for single [c,t,h,w] clips; batches ([b,c,t,h,w]) take the torch path
+    if NUMBA_IS_AVAILBLE and frames.dtype == torch.uint8 and frames.dim() == 4:
+        _to_normalized_float32(frames.numpy(), out.numpy())
+        return out
+    return torch.mul(frames, 1.0 / 127.5, out=out).sub_(1.0)
 
 
 class WebVid(Dataset):
@@ -36,6 +110,14 @@ class WebVid(Dataset):
                  load_raw_resolution=False,
                  fixed_fps=None,
                  random_fs=False,
+                 decord_resize=False,
+                 video_reader_cache_size=8,
+                 decord_num_threads=2,
+                 decord_ctx='cpu',
+                 gpu_preprocess=False,
+                 script_transform=False,
+                 prefetch_num=0,
+                 prefetch_threads=2,
                  ):
         self.meta_path = meta_path
         self.data_dir = data_dir
@@ -48,26 +130,75 @@ class WebVid(Dataset):
         self.fixed_fps = fixed_fps
         self.load_raw_resolution = load_raw_resolution
         self.random_fs = random_fs
+        self.decord_resize = decord_resize
+        if self.decord_resize:
+            assert spatial_transform == "resize_center_crop", "decord_resize only replaces the resize of resize_center_crop"
+            ## the fixed decode size below is not aspect-preserving for arbitrary videos
+            assert not self.load_raw_resolution, "decord_resize assumes the webvid aspect ratio and cannot be combined with load_raw_resolution"
+            ## resize the short side to min(resolution) during decode, assuming the webvid aspect ratio (530x300);
+            ## both sides are kept even to stay clear of the swscale alignment issue
+            short_side = min(self.resolution)
+            self.decode_size = (int(round(short_side * 530 / 300 / 2)) * 2, short_side + short_side % 2)
+        elif self.load_raw_resolution:
+            self.decode_size = None
+        else:
+            self.decode_size = (530, 300)
+        if self.decode_size is not None:
+            ## decord falls back to a non-compact copy when the width is not 32-aligned: request an aligned width
+            ## (height scaled alike to keep the aspect ratio) and center crop back to decode_size in _to_cthw
+            width, height = self.decode_size
+            aligned_width = (width + 31) & ~31
+            self.decode_request = (aligned_width, int(round(height * aligned_width / width / 2)) * 2)
+        ## LRU of opened VideoReaders, each dataloader worker process holds its own copy
+        self.video_reader_cache_size = video_reader_cache_size
+        self._vr_cache = OrderedDict()
+        ## numpy generator, bound lazily in each worker process (see _get_rng)
+        self._rng = None
+        self._rng_pid = None
+        ## background reads of the files of each batch handed out by the sampler (see __getitems__), passed to
+        ## decord as in-memory buffers; prefetch_num caps the reads in flight or buffered at once (0 disables)
+        self.prefetch_num = prefetch_num
+        self.prefetch_threads = prefetch_threads
+        self._io_pool = None
+        self._io_pool_pid = None
+        self._prefetched = OrderedDict()
+        self._pending_reads = deque()
+        ## 'gpu' decodes with NVDEC on the local device and keeps frames on it; requires num_workers=0 (checked in _get_video_reader)
+        assert decord_ctx in ['cpu', 'gpu'], f'unsupported decord_ctx: {decord_ctx}'
+        self.decord_num_threads = decord_num_threads
+        self.decord_ctx = decord_ctx
+        ## collating raw uint8 clips requires a fixed decode size
+        assert not gpu_preprocess or not self.load_raw_resolution, 'gpu_preprocess requires a fixed decode size'
+        ## a batched random crop would give every sample of the batch the same crop
+        assert not gpu_preprocess or spatial_transform != "random_crop", 'gpu_preprocess does not support random_crop'
         self._load_metadata()
         if spatial_transform is not None:
             if spatial_transform == "random_crop":
-                self.spatial_transform = transforms.RandomCrop(crop_resolution)
+                self.spatial_transform = v2.RandomCrop(crop_resolution)
             elif spatial_transform == "center_crop":
-                self.spatial_transform = transforms.Compose([
-                    transforms.CenterCrop(resolution),
+                self.spatial_transform = v2.Compose([
+                    v2.CenterCrop(resolution),
                     ])            
             elif spatial_transform == "resize_center_crop":
                 # assert(self.resolution[0] == self.resolution[1])
-                self.spatial_transform = transforms.Compose([
-                    transforms.Resize(min(self.resolution)),
-                    transforms.CenterCrop(self.resolution),
-                    ])
+                if self.decord_resize:
+                    ## frames already come out of decord at the resized resolution
+                    self.spatial_transform = v2.CenterCrop(self.resolution)
+                else:
+                    self.spatial_transform = v2.Compose([
+                        v2.Resize(min(self.resolution), antialias=True),
+                        v2.CenterCrop(self.resolution),
+                        ])
             elif spatial_transform == "resize":
-                self.spatial_transform = transforms.Resize(self.resolution)
+                self.spatial_transform = v2.Resize(self.resolution, antialias=True)
             else:
                 raise NotImplementedError
+            if script_transform:
+                self.spatial_transform = script_spatial_transform(self.spatial_transform)
         else:
             self.spatial_transform = None
+        ## defer spatial transform and normalization to the device, applied by DataModuleFromConfig.on_after_batch_transfer
+        self.gpu_preprocess = GpuPreprocess(self.spatial_transform, self.resolution) if gpu_preprocess else None
                 
     def _load_metadata(self):
         metadata = pd.read_csv(self.meta_path, dtype=str)
@@ -77,40 +208,125 @@ class WebVid(Dataset):
    
         metadata['caption'] = metadata['name']
         del metadata['name']
-        self.metadata = metadata
-        self.metadata.dropna(inplace=True)
+        metadata.dropna(inplace=True)
+        ## materialize paths and captions once, keeping pandas out of __getitem__
+        ## video_path should be in the format of "....../WebVid/videos/$page_dir/$videoid.mp4"
+        self.video_paths = [os.path.join(self.data_dir, 'videos', page_dir, str(videoid) + '.mp4')
+                            for page_dir, videoid in zip(metadata['page_dir'].tolist(), metadata['videoid'].tolist())]
+        self.captions = metadata['caption'].tolist()
+        ## per-sample decode cost estimate for CostBucketBatchSampler, file sizes are used if no duration is given
+        self._cost = metadata['duration_seconds'].astype(float).to_numpy() if 'duration_seconds' in metadata else None
+
+    def get_cost_weights(self):
+        if self._cost is None:
+            print('>>> no duration_seconds in meta file, estimating decode cost from file sizes.')
+            self._cost = np.array([os.path.getsize(p) if os.path.exists(p) else 0 for p in self.video_paths], dtype=np.float64)
+        return self._cost
+
+    def __getstate__(self):
+        ## open readers, the io pool and pending reads are per process and cannot be pickled
+        state = self.__dict__.copy()
+        state['_vr_cache'] = OrderedDict()
+        state['_io_pool'] = None
+        state['_io_pool_pid'] = None
+        state['_prefetched'] = OrderedDict()
+        state['_pending_reads'] = deque()
+        return state
 
-    def _get_video_path(self, sample):
-        rel_video_fp = os.path.join(sample['page_dir'], str(sample['videoid']) + '.mp4')
-        full_video_fp = os.path.join(self.data_dir, 'videos', rel_video_fp)
-        return full_video_fp
+    def _get_io_pool(self):
+        ## created lazily in each worker process, futures inherited from another process would never complete
+        if self._io_pool is None or self._io_pool_pid != os.getpid():
+            self._io_pool = ThreadPoolExecutor(max_workers=self.prefetch_threads)
+            self._io_pool_pid = os.getpid()
+            self._prefetched = OrderedDict()
+            self._pending_reads = deque()
+        return self._io_pool
+
+    def _prefetch(self, video_paths):
+        ## queue the reads of a new batch, dropping whatever the previous one left unused (e.g. skipped videos)
+        self._get_io_pool()
+        video_paths = [p for p in OrderedDict.fromkeys(video_paths) if p not in self._vr_cache]
+        for video_path in list(self._prefetched):
+            if video_path not in video_paths:
+                self._prefetched.pop(video_path).cancel()
+        self._pending_reads = deque(p for p in video_paths if p not in self._prefetched)
+        self._submit_reads()
+
+    def _submit_reads(self):
+        ## keep at most prefetch_num reads in flight or buffered
+        while self._pending_reads and len(self._prefetched) < self.prefetch_num:
+            video_path = self._pending_reads.popleft()
+            if video_path not in self._vr_cache:
+                self._prefetched[video_path] = self._io_pool.submit(_read_bytes, video_path)
+
+    def _get_video_reader(self, video_path):
+        if video_path in self._vr_cache:
+            self._vr_cache.move_to_end(video_path)
+            return self._vr_cache[video_path]
+
+        future = self._prefetched.pop(video_path, None) if self._io_pool_pid == os.getpid() else None
+        if future is not None:
+            ## a slot got free: start the next read before blocking on this one
+            self._submit_reads()
+            source = io.BytesIO(future.result())
+        else:
+            source = video_path
+        if self.decord_ctx == 'gpu':
+            ## cuda / nvdec cannot be initialized in forked dataloader workers
+            assert torch.utils.data.get_worker_info() is None, "decord_ctx='gpu' requires num_workers=0"
+            ctx = gpu(int(os.environ.get('LOCAL_RANK', 0)))
+        else:
+            ctx = cpu(0)
+        try:
+            if self.decode_size is None:
+                video_reader = VideoReader(source, ctx=ctx, num_threads=self.decord_num_threads)
+            else:
+                video_reader = VideoReader(source, ctx=ctx, width=self.decode_request[0], height=self.decode_request[1], num_threads=self.decord_num_threads)
+        except AssertionError as e:
+            ## decord asserts a positive frame count; report zero-frame files like any other decode failure,
+            ## while keeping our own assertions (e.g. the gpu check above) fatal
+            raise DECORDError(f"Invalid video {video_path}: {e}")
+
+        self._vr_cache[video_path] = video_reader
+        if len(self._vr_cache) > self.video_reader_cache_size:
+            self._vr_cache.popitem(last=False)
+        return video_reader
+
+    def _get_rng(self):
+        ## seeded like torch seeds each dataloader worker, rebound when running in a new (worker) process
+        if self._rng is None or self._rng_pid != os.getpid():
+            worker_info = torch.utils.data.get_worker_info()
+            seed = worker_info.seed if worker_info is not None else torch.initial_seed()
+            self._rng = np.random.default_rng(seed)
+            self._rng_pid = os.getpid()
+        return self._rng
     
-    def __getitem__(self, index):
+    def _sample_clip(self, index):
+        """
+        Find a loadable video starting from index and select the frame indices of a random clip.
+        Returns a dict with the opened reader, so decoding can be batched by the caller.
+        """
+        rng = self._get_rng()
         if self.random_fs:
-            frame_stride = random.randint(self.frame_stride_min, self.frame_stride)
+            frame_stride = int(rng.integers(self.frame_stride_min, self.frame_stride + 1))
         else:
             frame_stride = self.frame_stride
 
-        ## get frames until success
+        ## get a valid clip until success
         while True:
-            index = index % len(self.metadata)
-            sample = self.metadata.iloc[index]
-            video_path = self._get_video_path(sample)
-            ## video_path should be in the format of "....../WebVid/videos/$page_dir/$videoid.mp4"
-            caption = sample['caption']
+            index = index % len(self.video_paths)
+            video_path = self.video_paths[index]
 
             try:
-                if self.load_raw_resolution:
-                    video_reader = VideoReader(video_path, ctx=cpu(0))
-                else:
-                    video_reader = VideoReader(video_path, ctx=cpu(0), width=530, height=300)
+                video_reader = self._get_video_reader(video_path)
                 if len(video_reader) < self.video_length:
                     print(f"video length ({len(video_reader)}) is smaller than target length({self.video_length})")
                     index += 1
                     continue
                 else:
                     pass
-            except:
+            except (DECORDError, RuntimeError, OSError):
+                ## decord raises RuntimeError for unreadable files (zero-frame ones are mapped to DECORDError)
                 index += 1
                 print(f"Load video failed! path = {video_path}")
                 continue
@@ -136,39 +352,192 @@ class WebVid(Dataset):
 
             ## select a random clip
             random_range = frame_num - required_frame_num
-            start_idx = random.randint(0, random_range) if random_range > 0 else 0
+            start_idx = int(rng.integers(0, random_range + 1)) if random_range > 0 else 0
 
             ## calculate frame indices
-            frame_indices = [start_idx + frame_stride*i for i in range(self.video_length)]
-            try:
-                frames = video_reader.get_batch(frame_indices)
-                break
-            except:
-                print(f"Get frames failed! path = {video_path}; [max_ind vs frame_total:{max(frame_indices)} / {frame_num}]")
+            frame_indices = np.arange(self.video_length, dtype=np.int64) * frame_stride + start_idx
+            if frame_indices[-1] >= frame_num:
+                print(f"Frame indices out of range! path = {video_path}; [max_ind vs frame_total:{int(frame_indices.max())} / {frame_num}]")
                 index += 1
                 continue
-        
-        ## process data
+
+            return {'index': index, 'path': video_path, 'video_reader': video_reader, 'frame_indices': frame_indices,
+                    'frame_num': frame_num, 'fps_ori': fps_ori, 'frame_stride': frame_stride}
+
+    def _to_cthw(self, frames):
         assert(frames.shape[0] == self.video_length),f'{len(frames)}, self.video_length={self.video_length}'
-        frames = torch.tensor(frames.asnumpy()).permute(3, 0, 1, 2).float() # [t,h,w,c] -> [c,t,h,w]
-        
+        if self.decode_size is not None and self.decode_request != self.decode_size:
+            ## zero-copy center crop of the aligned decode back to decode_size
+            (width, height), (aligned_width, aligned_height) = self.decode_size, self.decode_request
+            frames = frames.narrow(1, (aligned_height - height) // 2, height).narrow(2, (aligned_width - width) // 2, width)
+        ## keep uint8 through the spatial transform, cast to float only for normalization;
+        ## the permute stays a strided view, normalize_frames writes the contiguous output in a single pass
+        return frames.permute(3, 0, 1, 2) # [t,h,w,c] -> [c,t,h,w]
+
+    def _apply_spatial_transform(self, frames):
         if self.spatial_transform is not None:
             frames = self.spatial_transform(frames)
         
         if self.resolution is not None:
             assert (frames.shape[2], frames.shape[3]) == (self.resolution[0], self.resolution[1]), f'frames={frames.shape}, self.resolution={self.resolution}'
-        
-        ## turn frames tensors to [-1,1]
-        frames = (frames / 255 - 0.5) * 2
-        fps_clip = fps_ori // frame_stride
+        return frames
+
+    def _clip_fps(self, clip):
+        fps_clip = clip['fps_ori'] // clip['frame_stride']
         if self.fps_max is not None and fps_clip > self.fps_max:
             fps_clip = self.fps_max
+        return fps_clip
+
+    def _process_clip(self, frames, clip):
+        ## process data
+        frames = self._to_cthw(frames)
+        if self.gpu_preprocess is None:
+            frames = self._apply_spatial_transform(frames)
+            ## turn frames tensors to [-1,1]
+            frames = normalize_frames(frames)
 
-        data = {'video': frames, 'caption': caption, 'path': video_path, 'fps': fps_clip, 'frame_stride': frame_stride}
+        data = {'video': frames, 'caption': self.captions[clip['index']], 'path': clip['path'], 'fps': self._clip_fps(clip), 'frame_stride': clip['frame_stride']}
         return data
+
+    def _load_clip(self, index):
+        ## get frames until success
+        while True:
+            clip = self._sample_clip(index)
+            try:
+                frames = _as_tensor(clip['video_reader'].get_batch(clip['frame_indices']))
+                return frames, clip
+            except DECORDError:
+                print(f"Get frames failed! path = {clip['path']}; [max_ind vs frame_total:{int(clip['frame_indices'].max())} / {clip['frame_num']}]")
+                index = clip['index'] + 1
+                continue
+
+    def __getitem__(self, index):
+        return self._process_clip(*self._load_clip(index))
+
+    def __getitems__(self, indices):
+        ## used by the DataLoader for a whole batch: clips of the same video are decoded with a single get_batch call
+        if self.prefetch_num > 0:
+            ## the sampler already decided these indices: queue their reads, so later videos are read while earlier ones decode
+            self._prefetch([self.video_paths[index % len(self.video_paths)] for index in indices])
+        groups = OrderedDict()
+        for i, index in enumerate(indices):
+            groups.setdefault(self.video_paths[index % len(self.video_paths)], []).append(i)
+
+        batch = [None] * len(indices)
+        for ids in groups.values():
+            ## open and decode each video as soon as its bytes are in, before waiting on the next one
+            clips = {i: self._sample_clip(indices[i]) for i in ids}
+            ## a failed video makes _sample_clip move on to another one, so regroup by the video actually loaded
+            loaded = OrderedDict()
+            for i in ids:
+                loaded.setdefault(clips[i]['path'], []).append(i)
+            for video_path, sub_ids in loaded.items():
+                frame_indices = np.concatenate([clips[i]['frame_indices'] for i in sub_ids])
+                try:
+                    frames = _as_tensor(clips[sub_ids[0]]['video_reader'].get_batch(frame_indices))
+                except DECORDError:
+                    ## fall back to per-sample loading, which moves on to the next valid video
+                    print(f"Get frames failed! path = {video_path}; [max_ind vs frame_total:{int(frame_indices.max())} / {clips[sub_ids[0]]['frame_num']}]")
+                    for i in sub_ids:
+                        batch[i] = self.__getitem__(clips[i]['index'] + 1)
+                    continue
+                for j, i in enumerate(sub_ids):
+                    batch[i] = self._process_clip(frames[j * self.video_length:(j + 1) * self.video_length], clips[i])
+        return batch
+
+    def precompute_shards(self, out_dir, shard_size=1000):
+        """
+        Decode every sample once and store its spatially transformed uint8 [t,h,w,c] clip into hdf5 shards,
+        to be read back by WebVidShards. Note the random clip (start frame / stride) of each sample is frozen here.
+        """
+        assert H5PY_IS_AVAILBLE, 'precompute_shards requires h5py'
+        os.makedirs(out_dir, exist_ok=True)
+        f = None
+        for i in tqdm(range(len(self)), desc="Precompute Shards"):
+            if i % shard_size == 0:
+                if f is not None:
+                    f.close()
+                f = h5py.File(os.path.join(out_dir, f'shard_{i // shard_size:05d}.h5'), 'w')
+            frames, clip = self._load_clip(i)
+            frames = self._apply_spatial_transform(self._to_cthw(frames))
+            frames = frames.permute(1, 2, 3, 0).contiguous().cpu().numpy() # [c,t,h,w] -> [t,h,w,c]
+            dset = f.create_dataset(f'clip_{i}', data=frames, chunks=frames.shape, compression=None)
+            dset.attrs['caption'] = self.captions[clip['index']]
+            dset.attrs['path'] = clip['path']
+            dset.attrs['fps'] = self._clip_fps(clip)
+            dset.attrs['frame_stride'] = clip['frame_stride']
+        if f is not None:
+            f.close()
     
     def __len__(self):
-        return len(self.metadata)
+        return len(self.video_paths)
+
+
+class WebVidShards(Dataset):
+    """
+    WebVid clips pre-decoded by WebVid.precompute_shards.
+    Assumes the shards are structured as follows.
+    shard_dir/
+        shard_00000.h5      (clip_$i: uint8 [t,h,w,c] with caption/path/fps/frame_stride attrs)
+        ...
+    """
+    def __init__(self, shard_dir):
+        assert H5PY_IS_AVAILBLE, 'WebVidShards requires h5py'
+        self.shard_dir = shard_dir
+        self.samples = []
+        for shard_path in sorted(glob(os.path.join(shard_dir, 'shard_*.h5'))):
+            with h5py.File(shard_path, 'r') as f:
+                self.samples += [(shard_path, key) for key in f.keys()]
+        print(f'>>> {len(self.samples)} data samples loaded.')
+        ## h5py handles cannot be pickled or shared across processes, each worker opens its own lazily
+        self._handles = {}
+        self._handles_pid = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_handles'] = {}
+        state['_handles_pid'] = None
+        return state
+
+    def _get_handle(self, shard_path):
+        if self._handles_pid != os.getpid():
+            self._handles = {}
+            self._handles_pid = os.getpid()
+        if shard_path not in self._handles:
+            self._handles[shard_path] = h5py.File(shard_path, 'r')
+        return self._handles[shard_path]
+
+    def __getitem__(self, index):
+        shard_path, key = self.samples[index]
+        dset = self._get_handle(shard_path)[key]
+        frames = torch.from_numpy(dset[()]).permute(3, 0, 1, 2) # [t,h,w,c] -> [c,t,h,w]
+        ## turn frames tensors to [-1,1]
+        frames = normalize_frames(frames)
+        attrs = dset.attrs
+        data = {'video': frames, 'caption': attrs['caption'], 'path': attrs['path'], 'fps': float(attrs['fps']), 'frame_stride': int(attrs['frame_stride'])}
+        return data
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class GpuPreprocess(nn.Module):
+    """
+    Batched spatial transform and [-1,1] normalization for uint8 video batches [b,c,t,h,w],
+    run once the batch is on the training device.
+    """
+    def __init__(self, spatial_transform=None, resolution=None):
+        super().__init__()
+        self.spatial_transform = spatial_transform
+        self.resolution = resolution
+
+    @torch.no_grad()
+    def forward(self, frames):
+        if self.spatial_transform is not None:
+            frames = self.spatial_transform(frames)
+        if self.resolution is not None:
+            assert (frames.shape[3], frames.shape[4]) == (self.resolution[0], self.resolution[1]), f'frames={frames.shape}, self.resolution={self.resolution}'
+        return normalize_frames(frames)
 
 
 if __name__== "__main__":
@@ -4,11 +4,12 @@ import numpy as np
 import torch
 import pytorch_lightning as pl
 from torch.utils.data import DataLoader, Dataset
+from torch.utils.data.distributed import DistributedSampler
 
 import os, sys
 os.chdir(sys.path[0])
 sys.path.append("..")
-from lvdm.data.base import Txt2ImgIterableBaseDataset
+from lvdm.data.base import Txt2ImgIterableBaseDataset, CostBucketBatchSampler
 from utils.utils import instantiate_from_config
 
 
@@ -45,7 +46,7 @@ class DataModuleFromConfig(pl.LightningDataModule):
     def __init__(self, batch_size, train=None, validation=None, test=None, predict=None,
                  wrap=False, num_workers=None, shuffle_test_loader=False, use_worker_init_fn=False,
                  shuffle_val_dataloader=False, train_img=None,
-                 test_max_n_samples=None):
+                 test_max_n_samples=None, pin_memory=False, cost_buckets=None):
         super().__init__()
         self.batch_size = batch_size
         self.dataset_configs = dict()
@@ -68,6 +69,8 @@ class DataModuleFromConfig(pl.LightningDataModule):
         self.wrap = wrap
         self.test_max_n_samples = test_max_n_samples
         self.collate_fn = None
+        self.pin_memory = pin_memory
+        self.cost_buckets = cost_buckets
 
     def prepare_data(self):
         pass
@@ -78,15 +81,60 @@ class DataModuleFromConfig(pl.LightningDataModule):
             for k in self.datasets:
                 self.datasets[k] = WrappedDataset(self.datasets[k])
 
+    def on_after_batch_transfer(self, batch, dataloader_idx):
+        ## datasets may defer their spatial transform / normalization to the device (e.g. WebVid(gpu_preprocess=True))
+        if self.trainer is None or not isinstance(batch, dict) or 'video' not in batch:
+            return batch
+        if self.trainer.training:
+            split = 'train'
+        elif self.trainer.validating or self.trainer.sanity_checking:
+            split = 'validation'
+        elif self.trainer.testing:
+            split = 'test'
+        else:
+            split = 'predict'
+        dataset = self.datasets.get(split)
+        if isinstance(dataset, WrappedDataset):
+            dataset = dataset.data
+        gpu_preprocess = getattr(dataset, 'gpu_preprocess', None)
+        if gpu_preprocess is not None:
+            batch['video'] = gpu_preprocess(batch['video'])
+        return batch
+
+    def _eval_sampler(self, dataset, shuffle=False):
+        ## cost_buckets needs `replace_sampler_ddp: False`, which also stops lightning from sharding the eval splits:
+        ## give them the DistributedSampler lightning would otherwise have injected
+        if self.cost_buckets is None or self.trainer is None or self.trainer.world_size <= 1 \
+                or isinstance(dataset, Txt2ImgIterableBaseDataset):
+            return None
+        return DistributedSampler(dataset, num_replicas=self.trainer.world_size, rank=self.trainer.global_rank, shuffle=shuffle)
+
     def _train_dataloader(self):
         is_iterable_dataset = isinstance(self.datasets['train'], Txt2ImgIterableBaseDataset)
         if is_iterable_dataset or self.use_worker_init_fn:
             init_fn = worker_init_fn
         else:
             init_fn = None
+        dataset = self.datasets["train"].data if isinstance(self.datasets["train"], WrappedDataset) else self.datasets["train"]
+        if self.cost_buckets is not None:
+            assert hasattr(dataset, 'get_cost_weights'), f'cost_buckets requires a train dataset with get_cost_weights(), got {type(dataset).__name__}'
+            ## batch samples of similar decode cost together, sharding across ranks is done by the sampler itself
+            world_size, rank = (self.trainer.world_size, self.trainer.global_rank) if self.trainer is not None else (1, 0)
+            if world_size > 1:
+                ## lightning would otherwise re-instantiate the batch sampler around a DistributedSampler and fail;
+                ## the val/test/predict loaders are sharded by _eval_sampler instead
+                assert not self.trainer._accelerator_connector.replace_sampler_ddp, \
+                    "cost_buckets under ddp requires `replace_sampler_ddp: False` in lightning.trainer"
+            batch_sampler = CostBucketBatchSampler(dataset.get_cost_weights(), self.batch_size, num_buckets=self.cost_buckets,
+                                                   num_replicas=world_size, rank=rank)
+            return DataLoader(self.datasets["train"], batch_sampler=batch_sampler,
+                              num_workers=self.num_workers, worker_init_fn=init_fn, collate_fn=self.collate_fn,
+                              pin_memory=self.pin_memory,
+                              )
         loader = DataLoader(self.datasets["train"], batch_size=self.batch_size,
                           num_workers=self.num_workers, shuffle=False if is_iterable_dataset else True,
                           worker_init_fn=init_fn, collate_fn=self.collate_fn,
+                          pin_memory=self.pin_memory,
                           )
         return loader
 
@@ -95,12 +143,15 @@ class DataModuleFromConfig(pl.LightningDataModule):
             init_fn = worker_init_fn
         else:
             init_fn = None
+        sampler = self._eval_sampler(self.datasets["validation"], shuffle=shuffle)
         return DataLoader(self.datasets["validation"],
                           batch_size=self.batch_size,
                           num_workers=self.num_workers,
                           worker_init_fn=init_fn,
-                          shuffle=shuffle, 
+                          shuffle=shuffle if sampler is None else False, 
+                          sampler=sampler,
                           collate_fn=self.collate_fn,
+                          pin_memory=self.pin_memory,
                           )
 
     def _test_dataloader(self, shuffle=False):
@@ -120,9 +171,11 @@ class DataModuleFromConfig(pl.LightningDataModule):
             dataset = torch.utils.data.Subset(self.datasets["test"], list(range(self.test_max_n_samples)))
         else:
             dataset = self.datasets["test"]
+        sampler = self._eval_sampler(dataset, shuffle=shuffle)
         return DataLoader(dataset, batch_size=self.batch_size,
-                          num_workers=self.num_workers, worker_init_fn=init_fn, shuffle=shuffle,
-                          collate_fn=self.collate_fn,
+                          num_workers=self.num_workers, worker_init_fn=init_fn,
+                          shuffle=shuffle if sampler is None else False, sampler=sampler,
+                          collate_fn=self.collate_fn, pin_memory=self.pin_memory,
                           )
 
     def _predict_dataloader(self, shuffle=False):
@@ -132,5 +185,6 @@ class DataModuleFromConfig(pl.LightningDataModule):
             init_fn = None
         return DataLoader(self.datasets["predict"], batch_size=self.batch_size,
                           num_workers=self.num_workers, worker_init_fn=init_fn,
-                          collate_fn=self.collate_fn,
+                          sampler=self._eval_sampler(self.datasets["predict"]),
+                          collate_fn=self.collate_fn, pin_memory=self.pin_memory,
                           )